@@ -1,85 +1,629 @@
 # MERGING MULTIPLE FILES - cleaned and fixed
 
+from __future__ import annotations
+
 import os
+import argparse
 import csv
+import functools
+import importlib.util
+import io
+import mmap
+import shutil
+import threading
 import warnings
-from typing import List, Optional
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+# pandas is imported inside the functions that need it: it takes a noticeable part of a
+# second to import, which would otherwise be paid even when no file is ever read
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow
+
+# Buffer size for sequential whole-file reads (the 8 KiB default means many more read syscalls).
+READ_BUFFER_SIZE = 1 << 20
+
+
+def _advise_sequential(fh) -> None:
+    """Tell the kernel `fh` will be read front to back (larger readahead); no-op where unsupported."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
 
 
 def show_problem_lines(file_path: str, context: int = 2, max_report: int = 20) -> None:
     """Print lines with odd number of double quotes (likely malformed)."""
-    bad = []
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as fh:
-        lines = fh.readlines()
-    for i, L in enumerate(lines, 1):
-        if L.count('"') % 2 == 1:
-            bad.append(i)
-            if len(bad) >= max_report:
-                break
-    if not bad:
-        print("No obvious unbalanced-quote lines found.")
-        return
-    print(f"Found {len(bad)} suspicious lines (showing up to {max_report}):")
-    for ln in bad:
-        start = max(0, ln - 1 - context)
-        end = min(len(lines), ln - 1 + context + 1)
-        print(f"\n--- Context for line {ln} ---")
-        for j in range(start, end):
-            prefix = ">>" if (j + 1) == ln else "  "
-            print(f"{prefix} {j+1:4d}: {lines[j].rstrip()}")
+    import numpy as np
 
+    with open(file_path, "rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file cannot be mapped
+            print("No obvious unbalanced-quote lines found.")
+            return
+    with mm:
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        # one vectorized pass: quote count per line from newline / quote byte positions
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        nl = np.flatnonzero(buf == 0x0A)
+        quotes = np.flatnonzero(buf == 0x22)
+        del buf  # release the buffer export so the map can be closed
+        counts = np.bincount(np.searchsorted(nl, quotes), minlength=len(nl) + 1)
+        bad = (np.flatnonzero(counts & 1)[:max_report] + 1).tolist()
+        if not bad:
+            print("No obvious unbalanced-quote lines found.")
+            return
+        n_lines = len(nl) + (0 if mm[-1:] == b"\n" else 1)
 
-def robust_read_file(fp: str, delimiter: Optional[str] = None) -> pd.DataFrame:
-    """
-    Read a CSV/TXT file robustly:
-    - Try pandas with engine='python' and on_bad_lines='warn', capturing ParserWarnings.
-    - Fallback to csv.reader and pad rows to same length if necessary.
-    """
-    # First attempt: pandas with warnings captured
-    try:
-        with open(fp, "r", encoding="utf-8", errors="ignore") as tf:
-            with warnings.catch_warnings(record=True) as wlist:
-                warnings.simplefilter("always")
+        def line_text(idx: int) -> str:
+            start = int(nl[idx - 1]) + 1 if idx > 0 else 0
+            end = int(nl[idx]) if idx < len(nl) else len(mm)
+            return mm[start:end].decode("utf-8", errors="ignore").rstrip()
+
+        print(f"Found {len(bad)} suspicious lines (showing up to {max_report}):")
+        for ln in bad:
+            start = max(0, ln - 1 - context)
+            end = min(n_lines, ln - 1 + context + 1)
+            print(f"\n--- Context for line {ln} ---")
+            for j in range(start, end):
+                prefix = ">>" if (j + 1) == ln else "  "
+                print(f"{prefix} {j+1:4d}: {line_text(j)}")
+
+
+def _report_parser_warnings(fp: str, wlist) -> None:
+    """Print the ParserWarnings recorded while reading `fp`, prefixed with its filename."""
+    import pandas as pd
+
+    for w in wlist:
+        if issubclass(w.category, pd.errors.ParserWarning):
+            print(f"[WARNING] While reading '{os.path.basename(fp)}': {w.message}")
+
+
+def _read_with_pandas(fp: str, delimiter: Optional[str], engine: str) -> pd.DataFrame:
+    """pd.read_csv with on_bad_lines='warn', reporting ParserWarnings with the filename."""
+    import pandas as pd
+
+    with warnings.catch_warnings(record=True) as wlist:
+        warnings.simplefilter("always")
+        if engine == "c":
+            with open(fp, "rb", buffering=READ_BUFFER_SIZE) as fh:
+                _advise_sequential(fh)
+                if not delimiter:
+                    # sniff from the bytes already buffered for the parse: one open, no extra read
+                    delimiter = _sniff_delim(fh.peek(SNIFF_SAMPLE_BYTES)[:SNIFF_SAMPLE_BYTES], default=",")
+                tf = io.TextIOWrapper(fh, encoding="utf-8", errors="ignore")
+                df = pd.read_csv(tf, delimiter=delimiter, engine="c", on_bad_lines="warn", low_memory=False)
+        else:
+            with open(fp, "r", encoding="utf-8", errors="ignore", buffering=READ_BUFFER_SIZE) as tf:
+                _advise_sequential(tf)
                 if delimiter:
                     df = pd.read_csv(tf, delimiter=delimiter, engine="python", on_bad_lines="warn")
                 else:
                     # let pandas try to infer
                     df = pd.read_csv(tf, sep=None, engine="python", on_bad_lines="warn")
-                # report parser warnings with filename context
-                for w in wlist:
-                    if issubclass(w.category, pd.errors.ParserWarning):
-                        print(f"[WARNING] While reading '{os.path.basename(fp)}': {w.message}")
-                return df
+        # report parser warnings with filename context
+        _report_parser_warnings(fp, wlist)
+        return df
+
+
+def _read_csv_table(fp: str, parse_options) -> pyarrow.Table:
+    """
+    pyarrow.csv read with values converted the way the pandas C reader would: empty/NA
+    strings as nulls and date/time columns left as text. Raises ValueError for non-UTF-8
+    text (which pyarrow types as binary) so callers can fall back to the pandas readers.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    read_options = pacsv.ReadOptions(block_size=8 << 20)
+    convert_options = pacsv.ConvertOptions(strings_can_be_null=True)
+    tbl = pacsv.read_csv(fp, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+    if any(pa.types.is_binary(f.type) or pa.types.is_large_binary(f.type) for f in tbl.schema):
+        raise ValueError(f"'{os.path.basename(fp)}' contains text that is not valid UTF-8")
+    temporal = [f.name for f in tbl.schema if pa.types.is_temporal(f.type)]
+    if temporal:
+        # pandas keeps date/time text as strings; re-read those columns as strings too
+        convert_options = pacsv.ConvertOptions(
+            strings_can_be_null=True, column_types={name: pa.string() for name in temporal}
+        )
+        tbl = pacsv.read_csv(
+            fp, read_options=read_options, parse_options=parse_options, convert_options=convert_options
+        )
+    return tbl
+
+
+def _read_with_pyarrow(fp: str, delimiter: str) -> pd.DataFrame:
+    """pyarrow.csv reader that skips malformed rows. Raises ImportError if pyarrow is missing."""
+    import pyarrow.csv as pacsv
+
+    skipped = set()  # row numbers; a set since date columns make _read_csv_table read twice
+
+    def _skip(row) -> str:
+        skipped.add(row.number)
+        return "skip"
+
+    parse_options = pacsv.ParseOptions(delimiter=delimiter, invalid_row_handler=_skip)
+    df = _read_csv_table(fp, parse_options).to_pandas()
+    if skipped:
+        print(f"[WARNING] While reading '{os.path.basename(fp)}': skipped {len(skipped)} malformed row(s)")
+    return df
+
+
+def robust_read_file(fp: str, delimiter: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read a CSV/TXT file robustly, trying the fastest parser first:
+    - pyarrow.csv (if installed, known delimiter), skipping malformed rows: first for files
+      over PYARROW_ENGINE_MIN_BYTES, where its multithreaded parse pays off, otherwise
+      after the C engine.
+    - pandas engine='c', on_bad_lines='warn', capturing ParserWarnings. Without a delimiter
+      it is sniffed from the same open file's buffer.
+    - pandas engine='python', which can also infer the delimiter.
+    - pyarrow.csv with ',' when no delimiter was known (so it has not been tried yet).
+    - Fallback to csv.reader and pad rows to same length if pyarrow is unavailable or fails.
+    """
+    import pandas as pd
+
+    arrow_first = bool(delimiter) and PYARROW_AVAILABLE and os.path.getsize(fp) > PYARROW_ENGINE_MIN_BYTES
+    if arrow_first:
+        try:
+            return _read_with_pyarrow(fp, delimiter)
+        except Exception:
+            pass
+    try:
+        return _read_with_pandas(fp, delimiter, engine="c")
+    except Exception:
+        pass
+    if delimiter and not arrow_first:
+        try:
+            return _read_with_pyarrow(fp, delimiter)
+        except Exception:
+            pass
+    try:
+        return _read_with_pandas(fp, delimiter, engine="python")
     except Exception:
-        # fallback: use csv.reader and normalize rows
-        rows: List[List[str]] = []
+        pass
+    if not delimiter:
+        try:
+            return _read_with_pyarrow(fp, ",")
+        except Exception:
+            pass
+    # last resort: use csv.reader and normalize rows
+    rows: List[List[str]] = []
+    try:
+        with open(fp, "r", encoding="utf-8", errors="ignore", buffering=READ_BUFFER_SIZE) as fh:
+            _advise_sequential(fh)
+            reader = csv.reader(fh)
+            for r in reader:
+                rows.append(r)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read file {fp}: {e}")
+    if not rows:
+        return pd.DataFrame()
+    maxlen = max(len(r) for r in rows)
+    cols = [f"col_{i+1}" for i in range(maxlen)]
+    normalized = [r + [""] * (maxlen - len(r)) for r in rows]
+    return pd.DataFrame(normalized, columns=cols)
+
+
+DELIMITER_CANDIDATES = (",", ";", "\t", "|")
+SNIFF_SAMPLE_BYTES = 8192
+# delimiter implied by the file extension, used when the header line agrees
+EXTENSION_DELIMITERS = {".csv": ","}
+
+# Rust-backed calamine reads .xls/.xlsx much faster than openpyxl/xlrd; xlsxwriter streams
+# rows out instead of building an openpyxl workbook. None lets pandas pick its default.
+EXCEL_READ_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+EXCEL_WRITE_ENGINE = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else None
+
+# CSV/TXT merges with differing headers above this total input size are streamed
+# chunk by chunk instead of being concatenated in memory.
+STREAM_THRESHOLD_BYTES = 256 << 20
+CHUNK_ROWS = 200_000
+# rows formatted per batch when writing CSV output (pandas to_csv chunksize)
+CSV_WRITE_ROWS = 64 * 1024
+
+# In-memory merges above this total input size are saved as Parquet when no output
+# name was given (and a Parquet engine is installed); Parquet can also be requested by name.
+PARQUET_THRESHOLD_BYTES = 100_000_000
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+PARQUET_AVAILABLE = PYARROW_AVAILABLE or importlib.util.find_spec("fastparquet") is not None
+
+# pyarrow.csv parses with several threads but has a start-up cost, so it is
+# only used for files larger than this
+PYARROW_ENGINE_MIN_BYTES = 4 << 20
+
+# `--engine polars` runs CSV/TXT merges as one lazy scan -> concat -> sink pipeline in Polars
+POLARS_AVAILABLE = importlib.util.find_spec("polars") is not None
+
+
+def _sniff_delim(sample: bytes, default: Optional[str] = None) -> Optional[str]:
+    """
+    Guess the delimiter of a raw byte sample.
+    Picks the candidate whose per-line count is most consistent (lowest stdev/mean);
+    csv.Sniffer is only consulted when no candidate appears at all.
+    """
+    lines = sample.split(b"\n")
+    if len(lines) > 1:
+        lines = lines[:-1]  # last line is probably cut off by the sample size
+    lines = [L for L in lines if L.strip()]
+    best, best_score = None, None
+    for cand in DELIMITER_CANDIDATES:
+        c = cand.encode()
+        counts = [L.count(c) for L in lines]
+        total = sum(counts)
+        if not total:
+            continue
+        mean = total / len(counts)
+        var = sum((n - mean) ** 2 for n in counts) / len(counts)
+        score = (var ** 0.5) / mean
+        # lower score = more consistent; on ties prefer the more frequent delimiter
+        if best_score is None or (score, -mean) < best_score:
+            best, best_score = cand, (score, -mean)
+    if best is not None:
+        return best
+    # final fallback: stdlib sniffer. Delimiters are ASCII, so replacing undecodable
+    # bytes loses nothing and avoids raising UnicodeDecodeError on non-UTF-8 files.
+    try:
+        return csv.Sniffer().sniff(sample.decode("utf-8", errors="replace")).delimiter
+    except Exception:
+        return default
+
+
+def _read_sample(fp: str, size: int = SNIFF_SAMPLE_BYTES) -> bytes:
+    """First `size` bytes of `fp`, read with a bare os.open/read pair (no buffered file object)."""
+    fd = os.open(fp, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+
+@functools.lru_cache(maxsize=1024)
+def _sniff_cached(fp: str, mtime_ns: int, size: int) -> Optional[str]:
+    """Sniff `fp` once per (mtime, size) version; the stat values only serve as cache keys."""
+    guess = EXTENSION_DELIMITERS.get(os.path.splitext(fp)[1].lower())
+    sample = _read_sample(fp)
+    first = sample[: sample.find(b"\n") + 1] or sample
+    counts = {c: first.count(c.encode()) for c in DELIMITER_CANDIDATES}
+    if guess and counts[guess] and counts[guess] == max(counts.values()):
+        # trust the extension when the header agrees with it; no full sniff needed
+        return guess
+    present = [c for c, n in counts.items() if n]
+    if len(present) == 1:
+        # only one candidate in the header line: unambiguous
+        return present[0]
+    return _sniff_delim(sample)
+
+
+def _sniff_file(fp: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a SNIFF_SAMPLE_BYTES sample of `fp` and return its delimiter (or `default`)."""
+    try:
+        st = os.stat(fp)
+        delimiter = _sniff_cached(fp, st.st_mtime_ns, st.st_size)
+    except Exception:
+        return default
+    return delimiter if delimiter is not None else default
+
+
+def _header_agrees(fp: str, delimiter: str) -> bool:
+    """True if `delimiter` is the most frequent candidate in the first line of `fp`."""
+    try:
+        first = _read_sample(fp, 1024)
+    except OSError:
+        return False
+    first = first[: first.find(b"\n") + 1] or first
+    n = first.count(delimiter.encode())
+    return bool(n) and all(first.count(c.encode()) <= n for c in DELIMITER_CANDIDATES)
+
+
+def _sniff_group(paths: List[str], default: Optional[str] = None) -> List[Optional[str]]:
+    """
+    Delimiters for a batch of sibling files: the first file is sniffed and its delimiter is
+    reused for every file whose header line agrees; only files that disagree are sniffed.
+    """
+    if not paths:
+        return []
+    first = _sniff_file(paths[0], default=default)
+    delims = [first]
+    for fp in paths[1:]:
+        delims.append(first if first and _header_agrees(fp, first) else _sniff_file(fp, default=default))
+    return delims
+
+
+def _load_file(fp: str) -> pd.DataFrame:
+    """Read a single supported file into a DataFrame, dispatching on its extension."""
+    import pandas as pd
+
+    ext = os.path.splitext(fp)[1].lower()
+    if ext in (".csv", ".txt"):
+        # the cached sniff is cheap (and usually warmed by _prime_cache); a known delimiter
+        # also enables the multithreaded pyarrow tiers of robust_read_file
+        return robust_read_file(fp, delimiter=_sniff_file(fp, default=","))
+    if ext == ".parquet":
+        return pd.read_parquet(fp)
+    return pd.read_excel(fp, engine=EXCEL_READ_ENGINE)
+
+
+def _headers_match(paths: List[str]) -> bool:
+    """True if every file in `paths` starts with the same (non-empty) header line."""
+    first = None
+    try:
+        for fp in paths:
+            with open(fp, "rb") as fh:
+                header = fh.readline().rstrip(b"\r\n")
+            if first is None:
+                first = header
+            elif header != first:
+                return False
+    except OSError:
+        return False
+    return bool(first)
+
+
+@contextmanager
+def _atomic_path(out_path: str):
+    """
+    Yield '<out_path>.part' to write to and rename it over `out_path` on success; on failure
+    it is removed. Lets `out_path` safely be one of the inputs still being read, and never
+    leaves a half-written output behind.
+    """
+    tmp_path = out_path + ".part"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def _atomic_output(out_path: str, mode: str = "wb", **kwargs):
+    """Open '<out_path>.part' for writing and rename it over `out_path` on success."""
+    with _atomic_path(out_path) as tmp_path:
+        with open(tmp_path, mode, **kwargs) as out:
+            yield out
+
+
+def _stream_concat(paths: List[str], out_path: str, bufsize: int = READ_BUFFER_SIZE) -> None:
+    """Write the first file verbatim, then append every other file without its header line."""
+    with _atomic_output(out_path, "wb") as out:
+        ends_with_newline = True
+        for idx, fp in enumerate(paths):
+            with open(fp, "rb") as fh:
+                _advise_sequential(fh)
+                if idx > 0:
+                    fh.readline()  # drop repeated header
+                start = out.tell()
+                if not ends_with_newline:
+                    out.write(b"\n")
+                shutil.copyfileobj(fh, out, length=bufsize)
+                if out.tell() > start:
+                    fh.seek(-1, os.SEEK_END)
+                    ends_with_newline = fh.read(1) == b"\n"
+
+
+def _stream_merge_csv(
+    paths: List[str], delims: List[Optional[str]], out_path: str, chunksize: int = CHUNK_ROWS
+) -> List[Optional[str]]:
+    """
+    Merge CSV/TXT files with differing headers without holding them in memory:
+    read each file in `chunksize`-row chunks, align every chunk to the union of all
+    columns and append it to the output. A file that fails partway has its rows cut off the
+    output again and is retried through robust_read_file's fallbacks.
+    Returns one error message (or None) per path.
+    """
+    import pandas as pd
+
+    errors: List[Optional[str]] = [None] * len(paths)
+    delims = [d or "," for d in delims]
+    columns: List[str] = []
+    seen = set()
+    for idx, (fp, delim) in enumerate(zip(paths, delims)):
         try:
-            with open(fp, "r", encoding="utf-8", errors="ignore") as fh:
-                reader = csv.reader(fh)
-                for r in reader:
-                    rows.append(r)
+            with open(fp, "r", encoding="utf-8", errors="ignore") as tf:
+                header = pd.read_csv(tf, delimiter=delim, engine="c", nrows=0).columns
         except Exception as e:
-            raise RuntimeError(f"Failed to read file {fp}: {e}")
-        if not rows:
-            return pd.DataFrame()
-        maxlen = max(len(r) for r in rows)
-        cols = [f"col_{i+1}" for i in range(maxlen)]
-        normalized = [r + [""] * (maxlen - len(r)) for r in rows]
-        return pd.DataFrame(normalized, columns=cols)
+            errors[idx] = str(e)
+            continue
+        for col in header:
+            if col not in seen:
+                seen.add(col)
+                columns.append(col)
+    if all(err is not None for err in errors):
+        return errors
+
+    with _atomic_output(out_path, "w", encoding="utf-8", newline="") as out:
+        pd.DataFrame(columns=columns).to_csv(out, index=False)
+        for idx, fp in enumerate(paths):
+            if errors[idx] is not None:
+                continue
+            start = out.tell()
+            try:
+                with warnings.catch_warnings(record=True) as wlist:
+                    warnings.simplefilter("always")
+                    with open(fp, "r", encoding="utf-8", errors="ignore", buffering=READ_BUFFER_SIZE) as tf:
+                        _advise_sequential(tf)
+                        reader = pd.read_csv(
+                            tf, delimiter=delims[idx], engine="c", on_bad_lines="warn", chunksize=chunksize
+                        )
+                        for chunk in reader:
+                            chunk.reindex(columns=columns).to_csv(out, index=False, header=False)
+                _report_parser_warnings(fp, wlist)
+            except Exception:
+                # drop the rows this file already wrote, then read it whole through the
+                # robust_read_file tiers (the chunked C parser has no fallbacks)
+                out.seek(start)
+                out.truncate()
+                try:
+                    df = robust_read_file(fp, delimiter=delims[idx])
+                except Exception as e:
+                    errors[idx] = str(e)
+                    continue
+                df.reindex(columns=columns).to_csv(out, index=False, header=False)
+    return errors
+
+
+def _read_concurrently(
+    paths: List[str], reader: Callable[[str], pd.DataFrame]
+) -> Tuple[List[Optional[pd.DataFrame]], List[Optional[str]]]:
+    """Read every path with `reader` on a thread pool; returns (frames, errors) in input order."""
+    results: List[Optional[pd.DataFrame]] = [None] * len(paths)
+    errors: List[Optional[str]] = [None] * len(paths)
+    workers = max(1, min(os.cpu_count() or 1, len(paths)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {ex.submit(reader, fp): idx for idx, fp in enumerate(paths)}
+        for fut in as_completed(futures):
+            idx = futures[fut]
+            try:
+                results[idx] = fut.result()
+            except Exception as e:
+                errors[idx] = str(e)
+    return results, errors
+
+
+def _concat_with_arrow(paths: List[str], delims: List[Optional[str]]) -> Optional[pyarrow.Table]:
+    """
+    Read every file with pyarrow.csv and concatenate the tables, unifying differing schemas.
+    Values are converted the way the pandas readers would (empty/NA strings as nulls, dates
+    left as text). Returns None if pyarrow is missing, any file fails or has non-UTF-8 text,
+    so the caller can fall back to the more forgiving pandas readers (which also report
+    per-file errors and drop undecodable bytes).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return None
+    try:
+        tables = [
+            _read_csv_table(fp, pacsv.ParseOptions(delimiter=delim or ","))
+            for fp, delim in zip(paths, delims)
+        ]
+
+        # a column inferred as e.g. int64 in one file and string in another cannot be
+        # promoted; store such columns as strings everywhere (numeric widening is fine)
+        col_types: dict = {}
+        for tbl in tables:
+            for field in tbl.schema:
+                if not pa.types.is_null(field.type):
+                    col_types.setdefault(field.name, set()).add(field.type)
+        to_string = {
+            name for name, types in col_types.items()
+            if len(types) > 1 and not all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types)
+        }
+        if to_string:
+            for i, tbl in enumerate(tables):
+                schema = pa.schema(
+                    [f.with_type(pa.string()) if f.name in to_string else f for f in tbl.schema]
+                )
+                tables[i] = tbl.cast(schema)
+        return pa.concat_tables(tables, promote_options="permissive")
+    except Exception:
+        return None
+
+
+def _concat_frames(dfs: List[pd.DataFrame]) -> pd.DataFrame:
+    """Stack `dfs` row-wise (union of columns, original order) with as little copying as possible."""
+    import pandas as pd
+
+    if len(dfs) == 1:
+        # nothing to stack; every reader already returns a default RangeIndex
+        return dfs[0]
+    # before pandas 3 (copy-on-write) copy=True was the default; later it is a no-op
+    kwargs = {"copy": False} if int(pd.__version__.split(".")[0]) < 3 else {}
+    return pd.concat(dfs, ignore_index=True, sort=False, **kwargs)
+
+
+def _write_frame(df: pd.DataFrame, out_path: str) -> None:
+    """Save `df` in the format implied by the extension of `out_path` (via '<out_path>.part')."""
+    ext = os.path.splitext(out_path)[1].lower()
+    with _atomic_path(out_path) as tmp_path:
+        if ext == ".parquet":
+            # files parsed separately can leave mixed int/str values in one object column,
+            # which Parquet cannot store; keep those columns as (nullable) strings
+            obj_cols = df.select_dtypes(include="object").columns
+            df = df.astype({col: "string" for col in obj_cols})
+            df.to_parquet(tmp_path, compression="snappy", index=False)
+        elif ext in (".xls", ".xlsx"):
+            # Excel writers reject a '.part' file name, so hand them the open file instead and
+            # name the engine pandas would have picked from the extension
+            write_engine = (EXCEL_WRITE_ENGINE or "openpyxl") if ext == ".xlsx" else "xlwt"
+            with open(tmp_path, "wb") as out:
+                df.to_excel(out, index=False, engine=write_engine)
+        else:
+            df.to_csv(tmp_path, index=False, encoding="utf-8", chunksize=CSV_WRITE_ROWS)
+
+
+def _write_table(table: pyarrow.Table, out_path: str) -> None:
+    """Save an Arrow table as Parquet (via '<out_path>.part') without going through pandas."""
+    import pyarrow.parquet as pq
+
+    with _atomic_path(out_path) as tmp_path:
+        pq.write_table(table, tmp_path, compression="snappy")
+
+
+def _merge_with_polars(paths: List[str], delims: List[Optional[str]], out_path: str) -> bool:
+    """
+    Scan every file lazily, union them by column name and sink the result straight to
+    `out_path` (CSV, or Parquet for a .parquet name). Returns False if Polars could not
+    parse the inputs, so the caller can fall back to the pandas/Arrow paths.
+    """
+    import polars as pl
+
+    frames = [
+        pl.scan_csv(fp, separator=delim or ",", infer_schema_length=10_000)
+        for fp, delim in zip(paths, delims)
+    ]
+    # diagonal: columns missing from a file become null; relaxed: mixed dtypes get a common supertype
+    lf = pl.concat(frames, how="diagonal_relaxed")
+    try:
+        with _atomic_path(out_path) as tmp_path:
+            if out_path.lower().endswith(".parquet"):
+                lf.sink_parquet(tmp_path, compression="snappy")
+            else:
+                lf.sink_csv(tmp_path)
+    except Exception as e:
+        print(f"[WARNING] Polars merge failed ({e}); falling back to the default engine.")
+        return False
+    return True
 
 
-def combine_and_save_files(data_dir: str, ext_choice: str, candidates: List[str]) -> Optional[str]:
+def combine_and_save_files(
+    data_dir: str,
+    ext_choice: str,
+    candidates: List[str],
+    streaming: bool = False,
+    engine: str = "pandas",
+) -> Optional[Tuple[str, Optional[pd.DataFrame]]]:
     """
     Combine all files in `candidates` (filenames) located in `data_dir` with extension `ext_choice`.
-    Ask user for output filename, save merged file in the same folder, and return the full path
-    (or None on abort/error). Reports per-file errors and continues.
+    Ask user for output filename, save merged file in the same folder, and return
+    (full path, merged DataFrame) so the caller does not need to re-read the file
+    (or None on abort/error). An output name ending in .parquet saves as Parquet, and so do
+    large in-memory merges when no name was given. The DataFrame is None when the output was
+    written straight to disk (a single file copied, identical CSV/TXT headers concatenated
+    byte-for-byte, or large inputs streamed in chunks). `streaming=True` streams CSV/TXT
+    merges in chunks regardless of size, except into a .parquet output (that is built in
+    memory unless Polars writes it); `engine="polars"` hands CSV/TXT merges to Polars
+    (when installed) and writes them straight to disk. Reports per-file errors and continues.
     """
+    import pandas as pd
+
     ext_choice = ext_choice.lower()
-    out_name = input(f"\nEnter output filename (leave blank for merged{ext_choice}): ").strip()
-    if not out_name:
+    out_name = input(
+        f"\nEnter output filename (leave blank for merged{ext_choice}, or end with .parquet): "
+    ).strip()
+    default_name = not out_name
+    if default_name:
         out_name = f"merged{ext_choice}"
-    if not out_name.lower().endswith(ext_choice):
+    want_parquet = out_name.lower().endswith(".parquet")
+    if not want_parquet and not out_name.lower().endswith(ext_choice):
         out_name = out_name + ext_choice
     out_path = os.path.join(data_dir, out_name)
     if os.path.exists(out_path):
@@ -88,62 +632,109 @@ def combine_and_save_files(data_dir: str, ext_choice: str, candidates: List[str]
             print("Aborting save.")
             return None
 
+    if len(candidates) == 1 and not want_parquet:
+        # nothing to merge: a plain copy gives the same file without a parse/write round trip
+        src = os.path.join(data_dir, candidates[0])
+        try:
+            if not (os.path.exists(out_path) and os.path.samefile(src, out_path)):
+                shutil.copyfile(src, out_path)
+        except Exception as e:
+            print(f"Error copying file: {e}")
+            return None
+        print(f"\nOnly one file selected; copied '{candidates[0]}' -> {out_path}")
+        return out_path, None
+
     per_file_errors: List[tuple] = []
     read_success: List[str] = []
     dfs: List[pd.DataFrame] = []
 
     try:
         if ext_choice in (".csv", ".txt"):
-            for fname in candidates:
-                fp = os.path.join(data_dir, fname)
-                try:
-                    # attempt delimiter sniff
-                    delimiter = None
-                    try:
-                        with open(fp, "rb") as fh:
-                            sample = fh.read(8192)
-                        try:
-                            sample_text = sample.decode("utf-8")
-                        except Exception:
-                            sample_text = sample.decode("latin1", errors="ignore")
-                        try:
-                            dialect = csv.Sniffer().sniff(sample_text)
-                            delimiter = dialect.delimiter
-                        except Exception:
-                            delimiter = None
-                    except Exception:
-                        delimiter = None
-
-                    df = robust_read_file(fp, delimiter=delimiter)
-                    dfs.append(df)
+            paths = [os.path.join(data_dir, fname) for fname in candidates]
+            total_size = sum(os.path.getsize(fp) for fp in paths)
+            delims = _sniff_group(paths)
+            if not want_parquet and _headers_match(paths):
+                # identical headers: append raw bytes, no parsing needed
+                _stream_concat(paths, out_path)
+                read_success.extend(candidates)
+                merged = None
+            elif engine == "polars" and POLARS_AVAILABLE and _merge_with_polars(paths, delims, out_path):
+                read_success.extend(candidates)
+                merged = None
+            elif not want_parquet and (streaming or total_size > STREAM_THRESHOLD_BYTES):
+                # too big to hold comfortably in memory: append chunk by chunk
+                errors = _stream_merge_csv(paths, delims, out_path)
+                for fname, fp, err in zip(candidates, paths, errors):
+                    if err is not None:
+                        per_file_errors.append((fname, err))
+                        print(f"[ERROR] Failed to read '{fname}': {err}")
+                        show_problem_lines(fp)
+                        continue
                     read_success.append(fname)
-                except Exception as e:
-                    per_file_errors.append((fname, str(e)))
-                    print(f"[ERROR] Failed to read '{fname}': {e}")
-                    show_problem_lines(fp)
-                    continue
+                merged = None
+            else:
+                if want_parquet and (streaming or total_size > STREAM_THRESHOLD_BYTES):
+                    print(
+                        "Note: chunk-by-chunk streaming only applies to CSV/TXT output; "
+                        "the Parquet file is built in memory."
+                    )
+                if default_name and total_size > PARQUET_THRESHOLD_BYTES and PARQUET_AVAILABLE:
+                    # large merge with no name given: Parquet is far smaller and faster to write
+                    pq_path = os.path.splitext(out_path)[0] + ".parquet"
+                    if not os.path.exists(pq_path):
+                        print(f"Large merge: saving as Parquet '{os.path.basename(pq_path)}' instead of CSV.")
+                        out_path = pq_path
 
-            if not dfs:
+                table = _concat_with_arrow(paths, delims)
+                if table is not None:
+                    # pyarrow.csv parses each file with several threads and the schemas are unified
+                    # in one concat; the frame is still built once by to_pandas(), but a Parquet
+                    # output is written from the table without converting back
+                    read_success.extend(candidates)
+                    merged = table.to_pandas()
+                    if out_path.lower().endswith(".parquet"):
+                        _write_table(table, out_path)
+                    else:
+                        # pandas quotes only the values that need it, like every other path
+                        _write_frame(merged, out_path)
+                else:
+                    by_path = dict(zip(paths, delims))
+                    results, errors = _read_concurrently(
+                        paths, reader=lambda fp: robust_read_file(fp, delimiter=by_path[fp])
+                    )
+
+                    # report and collect in the original file order
+                    for fname, fp, df, err in zip(candidates, paths, results, errors):
+                        if err is not None:
+                            per_file_errors.append((fname, err))
+                            print(f"[ERROR] Failed to read '{fname}': {err}")
+                            show_problem_lines(fp)
+                            continue
+                        dfs.append(df)
+                        read_success.append(fname)
+
+                    merged = None
+                    if dfs:
+                        merged = _concat_frames(dfs)
+                        _write_frame(merged, out_path)
+
+            if not read_success:
                 print("No files could be read successfully. Aborting merge.")
                 if per_file_errors:
                     print("\nFiles with errors:")
                     for f, err in per_file_errors:
                         print(f" - {f}: {err}")
                 return None
-
-            merged = pd.concat(dfs, ignore_index=True, sort=False)
-            merged.to_csv(out_path, index=False, encoding="utf-8")
         else:  # Excel
-            for fname in candidates:
-                fp = os.path.join(data_dir, fname)
-                try:
-                    df = pd.read_excel(fp)
-                    dfs.append(df)
-                    read_success.append(fname)
-                except Exception as e:
-                    per_file_errors.append((fname, str(e)))
-                    print(f"[ERROR] Failed to read '{fname}': {e}")
+            paths = [os.path.join(data_dir, fname) for fname in candidates]
+            results, errors = _read_concurrently(paths, reader=_load_file)
+            for fname, df, err in zip(candidates, results, errors):
+                if err is not None:
+                    per_file_errors.append((fname, err))
+                    print(f"[ERROR] Failed to read '{fname}': {err}")
                     continue
+                dfs.append(df)
+                read_success.append(fname)
             if not dfs:
                 print("No Excel files could be read successfully. Aborting merge.")
                 if per_file_errors:
@@ -151,15 +742,15 @@ def combine_and_save_files(data_dir: str, ext_choice: str, candidates: List[str]
                     for f, err in per_file_errors:
                         print(f" - {f}: {err}")
                 return None
-            merged = pd.concat(dfs, ignore_index=True, sort=False)
-            merged.to_excel(out_path, index=False)
+            merged = _concat_frames(dfs)
+            _write_frame(merged, out_path)
 
         print(f"\nMerged {len(read_success)} / {len(candidates)} files -> {out_path}")
         if per_file_errors:
             print("\nSome files failed to merge:")
             for fname, err in per_file_errors:
                 print(f" - {fname}: {err}")
-        return out_path
+        return out_path, merged
     except Exception as e:
         print(f"Error merging files: {e}")
         if per_file_errors:
@@ -169,8 +760,25 @@ def combine_and_save_files(data_dir: str, ext_choice: str, candidates: List[str]
         return None
 
 
-def load_data(data_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
-    allowed = [".csv", ".txt", ".xls", ".xlsx"]
+def _prime_cache(paths: List[str]) -> None:
+    """Best-effort read-ahead hint (and delimiter sniff) for files that are about to be read."""
+    for fp in paths:
+        try:
+            with open(fp, "rb") as fh:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                else:
+                    fh.read(READ_BUFFER_SIZE)
+            if fp.lower().endswith((".csv", ".txt")):
+                _sniff_file(fp)
+        except OSError:
+            continue
+
+
+def load_data(
+    data_dir: Optional[str] = None, streaming: bool = False, engine: str = "pandas"
+) -> Optional[pd.DataFrame]:
+    allowed = frozenset((".csv", ".txt", ".xls", ".xlsx"))
     if data_dir is None:
         default_dir = os.path.dirname(os.path.abspath(__file__))
         print()
@@ -180,23 +788,23 @@ def load_data(data_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
         print(f"Directory '{data_dir}' does not exist.")
         return None
 
-    # collect only allowed files
-    files: List[str] = []
-    for fname in sorted(os.listdir(data_dir)):
-        path = os.path.join(data_dir, fname)
-        if os.path.isfile(path):
+    # collect only allowed files, grouped by extension, in one directory pass
+    found: List[Tuple[str, str]] = []
+    with os.scandir(data_dir) as it:
+        for entry in it:
+            fname = entry.name
+            if fname.startswith(("~$", ".")) or not entry.is_file():
+                continue
             ext = os.path.splitext(fname)[1].lower()
-            if ext in allowed and not fname.startswith("~$") and not fname.startswith("."):
-                files.append(fname)
-    if not files:
+            if ext in allowed:
+                found.append((fname, ext))
+    if not found:
         print("No supported files (.csv, .txt, .xls, .xlsx) found in the folder.")
         return None
 
-    # group by extension
     exts: dict = {}
-    for f in files:
-        ext = os.path.splitext(f)[1].lower()
-        exts.setdefault(ext, []).append(f)
+    for fname, ext in sorted(found):
+        exts.setdefault(ext, []).append(fname)
 
     while True:
         print("\nAvailable file types in the folder:")
@@ -224,6 +832,10 @@ def load_data(data_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
         print(f"\nFiles with '{ext_choice}':")
         for idx, fname in enumerate(candidates, 1):
             print(f"{idx}. {fname}")
+        # warm the OS cache while the user answers the prompts below
+        threading.Thread(
+            target=_prime_cache, args=([os.path.join(data_dir, f) for f in candidates],), daemon=True
+        ).start()
 
         # Ask if these are the expected files (Y/N)
         ans_all = input("\nAre these the expected files to load? (y/n) [q to quit]: ").strip().lower()
@@ -235,69 +847,45 @@ def load_data(data_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
             continue
 
         if ans_all in ("y", "yes"):
-            # ask whether to combine all files or pick one
-            comb = input(f"Combine all {len(candidates)} '{ext_choice}' files into one file? (y/n): ").strip().lower()
+            # one prompt: combine all, or pick a single file by its number
+            comb = input(
+                f"Combine all {len(candidates)} '{ext_choice}' files into one file? "
+                "(y/n, or a file number to load just that file) [q to quit]: "
+            ).strip().lower()
+            if comb in ("q", "quit"):
+                print("Selection cancelled by user.")
+                return None
             if comb in ("y", "yes"):
-                merged_path = combine_and_save_files(data_dir, ext_choice, candidates)
-                if not merged_path:
+                res = combine_and_save_files(
+                    data_dir, ext_choice, candidates, streaming=streaming, engine=engine
+                )
+                if not res:
                     continue  # back to selection on failure/abort
-                try:
-                    if ext_choice in (".csv", ".txt"):
-                        with open(merged_path, "rb") as fh:
-                            sample = fh.read(8192)
-                        try:
-                            sample_text = sample.decode("utf-8")
-                        except Exception:
-                            sample_text = sample.decode("latin1", errors="ignore")
-                        try:
-                            dialect = csv.Sniffer().sniff(sample_text)
-                            delimiter = dialect.delimiter
-                        except Exception:
-                            delimiter = ","
-                        with open(merged_path, "r", encoding="utf-8", errors="ignore") as tf:
-                            df = pd.read_csv(tf, delimiter=delimiter, engine="python", on_bad_lines="warn")
-                    else:
-                        df = pd.read_excel(merged_path)
-                    print()
-                    print(f"Loaded merged file '{os.path.basename(merged_path)}' with {len(df):,} records and {len(df.columns):,} columns.")
-                    return df
-                except Exception as e:
-                    print(f"Error loading merged file: {e}")
-                    continue
+                merged_path, df = res
+                if df is None:
+                    try:
+                        df = _load_file(merged_path)
+                    except Exception as e:
+                        print(f"Error loading merged file: {e}")
+                        continue
+                print()
+                print(f"Loaded merged file '{os.path.basename(merged_path)}' with {len(df):,} records and {len(df.columns):,} columns.")
+                return df
             else:
-                # let user pick one of the listed files (Y/N per file)
-                selected_file = None
-                for fname in candidates:
-                    pick = input(f"\nLoad '{fname}'? (y/n) [q to quit]: ").strip().lower()
+                # let user pick one of the listed files by number
+                pick = comb
+                if pick in ("n", "no"):
+                    pick = input(f"\nEnter the number of the file to load (1-{len(candidates)}) [q to quit]: ").strip().lower()
                     if pick in ("q", "quit"):
                         print("Selection cancelled by user.")
                         return None
-                    if pick in ("y", "yes"):
-                        selected_file = fname
-                        break
-                    else:
-                        continue
-                if not selected_file:
+                if not (pick.isdigit() and 1 <= int(pick) <= len(candidates)):
                     print("No file selected; returning to extension selection.")
                     continue
+                selected_file = candidates[int(pick) - 1]
                 file_path = os.path.join(data_dir, selected_file)
                 try:
-                    if ext_choice in (".csv", ".txt"):
-                        with open(file_path, "rb") as fh:
-                            sample = fh.read(8192)
-                        try:
-                            sample_text = sample.decode("utf-8")
-                        except Exception:
-                            sample_text = sample.decode("latin1", errors="ignore")
-                        try:
-                            dialect = csv.Sniffer().sniff(sample_text)
-                            delimiter = dialect.delimiter
-                        except Exception:
-                            delimiter = ","
-                        with open(file_path, "r", encoding="utf-8", errors="ignore") as tf:
-                            df = pd.read_csv(tf, delimiter=delimiter, engine="python", on_bad_lines="warn")
-                    else:
-                        df = pd.read_excel(file_path)
+                    df = _load_file(file_path)
                     print()
                     print(f"Data loaded successfully from '{selected_file}' with {len(df):,} records and {len(df.columns):,} columns.")
                     return df
@@ -311,8 +899,26 @@ def load_data(data_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
         continue
 
 
-def main():
-    df = load_data()
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Merge CSV/TXT/Excel files from a folder and load the result.")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help=(
+            "merge CSV/TXT files chunk by chunk with bounded memory, whatever their total size "
+            "(not for .parquet output, which is built in memory)"
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("pandas", "polars"),
+        default="pandas",
+        help="library used for CSV/TXT merges; polars runs them as one lazy streaming pipeline",
+    )
+    args = parser.parse_args(argv)
+    if args.engine == "polars" and not POLARS_AVAILABLE:
+        print("Polars is not installed; using the pandas engine.")
+    df = load_data(streaming=args.streaming, engine=args.engine)
     if df is not None:
         print("\nFirst 5 rows of the loaded data:")
         print(df.head())